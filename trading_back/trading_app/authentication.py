@@ -0,0 +1,97 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from .models import User
+
+# User columns kept in the cache, in model order as Model.from_db() expects.
+# Everything else (notably password and balance) is left deferred and read
+# from the database on first access.
+CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {'id', 'email', 'username', 'name', 'userid', 'is_active', 'is_staff', 'is_superuser'}
+)
+
+
+def token_cache_key(key):
+    # Hash the token so raw credentials never end up in the cache backend
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_version_key(key):
+    return token_cache_key(key) + ':version'
+
+
+def token_cache_is_shared():
+    """
+    Whether the default cache is shared between workers. A per-process cache
+    would keep serving a token after it was revoked in another worker.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def forget_cached_token(key):
+    """
+    Invalidate a cached token once the surrounding transaction commits
+    
+    Dropping the version makes the next lookup start a new one, so entries
+    filled under the old version, including ones written by a request that
+    read the token before this commit, are never served again.
+    """
+    transaction.on_commit(lambda: cache.delete(token_version_key(key)))
+
+
+def forget_cached_user(user_id):
+    """
+    Invalidate the cached token of a user once the surrounding transaction commits
+    
+    Called by the User signals. Queryset updates bypass them, so code that
+    changes cached columns that way must call this itself; otherwise the
+    change shows up once TOKEN_CACHE_TIMEOUT expires.
+    """
+    if not token_cache_is_shared():
+        return
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        forget_cached_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token -> user lookup
+    
+    Each entry records the token's cache version at the time it was filled and
+    is only served while that version is current (see forget_cached_token).
+    Only CACHED_USER_FIELDS are stored; the rest of the user is loaded lazily
+    so balances and password hashes always come from the database.
+    
+    Behaves like plain TokenAuthentication unless the default cache is shared
+    between workers, so revocations always take effect everywhere.
+    """
+    def authenticate_credentials(self, key):
+        if not token_cache_is_shared():
+            return super().authenticate_credentials(key)
+        
+        entry_key, version_key = token_cache_key(key), token_version_key(key)
+        cached = cache.get_many([entry_key, version_key])
+        entry, version = cached.get(entry_key), cached.get(version_key)
+        if entry is not None and entry['version'] == version:
+            user = User.from_db(router.db_for_read(User), CACHED_USER_FIELDS, entry['values'])
+            return user, Token(key=key, user=user)
+        
+        # Take the version before reading the token, so a change committed in
+        # between leaves this entry stale rather than serving it
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, None)
+            version = cache.get(version_key)
+        
+        user, token = super().authenticate_credentials(key)
+        cache.set(entry_key, {
+            'version': version,
+            'values': [getattr(user, name) for name in CACHED_USER_FIELDS],
+        }, settings.TOKEN_CACHE_TIMEOUT)
+        return user, token
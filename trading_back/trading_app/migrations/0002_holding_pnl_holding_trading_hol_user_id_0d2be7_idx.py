@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:00
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='holding',
+            name='pnl',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('quantity'), '*', django.db.models.expressions.CombinedExpression(models.F('current_price'), '-', models.F('buying_price'))), help_text='Profit or loss stored by the database for indexed filtering', output_field=models.DecimalField(decimal_places=2, max_digits=20)),
+        ),
+        migrations.AddIndex(
+            model_name='holding',
+            index=models.Index(fields=['user', 'pnl'], name='trading_hol_user_id_0d2be7_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_app', '0002_holding_pnl_holding_trading_hol_user_id_0d2be7_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date'], name='trading_tra_user_id_aa5715_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-date'], name='trading_tra_user_id_cd2edb_idx'),
+        ),
+    ]
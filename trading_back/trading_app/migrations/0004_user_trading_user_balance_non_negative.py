@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('trading_app', '0003_transaction_trading_tra_user_id_aa5715_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.CheckConstraint(condition=models.Q(('balance__gte', 0)), name='trading_user_balance_non_negative'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading_app', '0004_user_trading_user_balance_non_negative'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='holding',
+            index=models.Index(fields=['user', '-date_purchased'], name='trading_hol_user_id_ea4af2_idx'),
+        ),
+    ]
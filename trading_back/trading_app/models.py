@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from functools import cached_property
 
 
 class User(AbstractUser):
@@ -31,6 +32,12 @@ class User(AbstractUser):
         db_table = 'trading_user'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(balance__gte=0),
+                name='trading_user_balance_non_negative'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.email})"
@@ -93,6 +100,10 @@ class Transaction(models.Model):
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['user', '-date']),
+            models.Index(fields=['user', 'transaction_type', '-date']),
+        ]
     
     def __str__(self):
         return f"{self.user.name} - {self.transaction_type} - ${self.credit - self.debit}"
@@ -131,6 +142,12 @@ class Holding(models.Model):
         auto_now_add=True,
         help_text="Date when stock was purchased"
     )
+    pnl = models.GeneratedField(
+        expression=models.F('quantity') * (models.F('current_price') - models.F('buying_price')),
+        output_field=models.DecimalField(max_digits=20, decimal_places=2),
+        db_persist=True,
+        help_text="Profit or loss stored by the database for indexed filtering"
+    )
     
     class Meta:
         db_table = 'trading_holding'
@@ -138,28 +155,53 @@ class Holding(models.Model):
         verbose_name_plural = 'Holdings'
         unique_together = ['user', 'stock']
         ordering = ['-date_purchased']
+        indexes = [
+            models.Index(fields=['user', '-date_purchased']),
+            models.Index(fields=['user', 'pnl']),
+        ]
+    
+    # Fields the calculated values below are derived from
+    CALCULATION_FIELDS = frozenset({'quantity', 'buying_price', 'current_price'})
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.CALCULATION_FIELDS:
+            self.clear_cached_values()
     
-    @property
+    def clear_cached_values(self):
+        for name in self.CACHED_PROPERTIES:
+            self.__dict__.pop(name, None)
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # The database recomputes pnl on write; defer it so the next read loads the new value
+        self.__dict__.pop('pnl', None)
+    
+    @cached_property
     def total_invested(self):
         """Calculate total amount invested in this holding"""
         return self.quantity * self.buying_price
     
-    @property
+    @cached_property
     def current_value(self):
         """Calculate current market value of this holding"""
         return self.quantity * self.current_price
     
-    @property
+    @cached_property
     def profit_loss(self):
         """Calculate profit or loss for this holding"""
         return self.current_value - self.total_invested
     
-    @property
+    @cached_property
     def profit_loss_percentage(self):
         """Calculate profit/loss percentage"""
         if self.total_invested > 0:
             return (self.profit_loss / self.total_invested) * 100
         return 0
     
+    # Calculated values cached per instance; cleared whenever a calculation field
+    # is assigned, which includes refresh_from_db(). vars() is the class namespace
+    CACHED_PROPERTIES = tuple(name for name, value in vars().items() if isinstance(value, cached_property))
+    
     def __str__(self):
         return f"{self.user.name} - {self.stock} ({self.quantity} shares)"
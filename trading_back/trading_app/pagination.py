@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Cursor pagination for transactions, served by the (user, -date) index
+    """
+    ordering = '-date'
+
+
+class HoldingCursorPagination(CursorPagination):
+    """
+    Cursor pagination for holdings, served by the (user, -date_purchased) index
+    """
+    ordering = '-date_purchased'
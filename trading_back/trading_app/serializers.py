@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from decimal import Decimal
+from drf_serializer_cache import SerializerCacheMixin
 from .models import User, Transaction, Holding
 
 
@@ -16,7 +20,8 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined', 'last_login']
     
     def validate(self, attrs):
-        if attrs['password'] != attrs['password_confirm']:
+        # Partial updates may leave the password out altogether
+        if attrs.get('password') != attrs.get('password_confirm'):
             raise serializers.ValidationError("Passwords don't match")
         return attrs
     
@@ -31,14 +36,17 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         validated_data.pop('password_confirm', None)
         password = validated_data.pop('password', None)
+        update_fields = list(validated_data)
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
         if password:
             instance.set_password(password)
+            update_fields.append('password')
         
-        instance.save()
+        # Only write the submitted columns so a concurrent balance change isn't overwritten
+        instance.save(update_fields=update_fields)
         return instance
 
 
@@ -90,7 +98,41 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password')
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class AnnotationFallbackMixin:
+    """
+    Mixin for read-only fields whose source is a queryset annotation. Instances
+    loaded without the annotation fall back to the model property named after
+    the field instead of the field being silently left out.
+    """
+    def get_attribute(self, instance):
+        if hasattr(instance, self.source):
+            return super().get_attribute(instance)
+        return getattr(instance, self.field_name)
+
+
+class AnnotatedDecimalField(AnnotationFallbackMixin, serializers.DecimalField):
+    pass
+
+
+class AnnotatedFloatField(AnnotationFallbackMixin, serializers.FloatField):
+    pass
+
+
+def update_balance(user, net_amount):
+    """
+    Add net_amount to the user's balance in a single UPDATE and return the new balance
+    """
+    try:
+        with transaction.atomic():
+            User.objects.filter(pk=user.pk).update(balance=F('balance') + net_amount)
+    except IntegrityError:
+        raise serializers.ValidationError('Insufficient balance')
+    
+    user.refresh_from_db(fields=['balance'])
+    return user.balance
+
+
+class TransactionSerializer(SerializerCacheMixin, serializers.ModelSerializer):
     """
     Serializer for Transaction model
     """
@@ -103,19 +145,13 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date', 'balance_after']
     
     def create(self, validated_data):
-        # Calculate balance_after based on user's current balance
         user = validated_data['user']
-        current_balance = user.balance
-        
-        # Update user balance
-        net_amount = validated_data['credit'] - validated_data['debit']
-        user.balance += net_amount
-        user.save()
-        
-        # Set balance_after
-        validated_data['balance_after'] = user.balance
+        net_amount = validated_data.setdefault('credit', Decimal('0.00')) - validated_data.setdefault('debit', Decimal('0.00'))
         
-        return super().create(validated_data)
+        with transaction.atomic():
+            # Update user balance and set balance_after
+            validated_data['balance_after'] = update_balance(user, net_amount)
+            return super().create(validated_data)
 
 
 class TransactionCreateSerializer(serializers.ModelSerializer):
@@ -129,29 +165,32 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['user'] = user
+        net_amount = validated_data.setdefault('credit', Decimal('0.00')) - validated_data.setdefault('debit', Decimal('0.00'))
         
-        # Calculate balance_after based on user's current balance
-        current_balance = user.balance
-        net_amount = validated_data['credit'] - validated_data['debit']
-        user.balance += net_amount
-        user.save()
-        
-        # Set balance_after
-        validated_data['balance_after'] = user.balance
-        
-        return super().create(validated_data)
+        with transaction.atomic():
+            # Update user balance and set balance_after
+            validated_data['balance_after'] = update_balance(user, net_amount)
+            return super().create(validated_data)
 
 
-class HoldingSerializer(serializers.ModelSerializer):
+class HoldingSerializer(SerializerCacheMixin, serializers.ModelSerializer):
     """
     Serializer for Holding model
     """
     user_name = serializers.CharField(source='user.name', read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
-    total_invested = serializers.ReadOnlyField()
-    current_value = serializers.ReadOnlyField()
-    profit_loss = serializers.ReadOnlyField()
-    profit_loss_percentage = serializers.ReadOnlyField()
+    # Computed by the database (see HoldingViewSet.get_queryset), or by the
+    # model properties of the same name on instances loaded without annotations
+    total_invested = AnnotatedDecimalField(
+        source='invested_amount', max_digits=20, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    current_value = AnnotatedDecimalField(
+        source='market_value', max_digits=20, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    profit_loss = serializers.DecimalField(
+        source='pnl', max_digits=20, decimal_places=2, coerce_to_string=False, read_only=True
+    )
+    profit_loss_percentage = AnnotatedFloatField(source='pnl_percentage', read_only=True)
     
     class Meta:
         model = Holding
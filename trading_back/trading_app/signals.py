@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import forget_cached_token, forget_cached_user
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Keep CachedTokenAuthentication from serving a stale user
+    """
+    # A new user has no token yet, and a deleted user's token is revoked on its own delete
+    if kwargs.get('created') or kwargs['signal'] is post_delete:
+        return
+    forget_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Revoke a cached token as soon as it is deleted (e.g. on logout)
+    """
+    forget_cached_token(instance.key)
@@ -1,3 +1,278 @@
-from django.test import TestCase
+import tempfile
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from .authentication import CACHED_USER_FIELDS, CachedTokenAuthentication, token_cache_key, token_version_key
+from .models import User, Holding
+from .serializers import HoldingSerializer
 
-# Create your tests here.
+
+def create_user(email='trader@example.com', **fields):
+    fields.setdefault('username', email.split('@')[0])
+    fields.setdefault('name', 'Trader')
+    fields.setdefault('userid', email)
+    return User.objects.create_user(email=email, password='securepass123', **fields)
+
+
+class HoldingModelTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.holding = Holding.objects.create(
+            user=self.user, stock='AAPL', quantity=10,
+            buying_price=Decimal('10.00'), current_price=Decimal('12.00')
+        )
+
+    def test_assigning_a_price_recalculates_the_values(self):
+        holding = Holding.objects.get(pk=self.holding.pk)
+        self.assertEqual(holding.profit_loss, Decimal('20.00'))
+
+        holding.current_price = Decimal('8.00')
+        self.assertEqual(holding.current_value, Decimal('80.00'))
+        self.assertEqual(holding.profit_loss, Decimal('-20.00'))
+        self.assertEqual(holding.profit_loss_percentage, Decimal('-20'))
+
+        holding.quantity = 5
+        holding.save()
+        self.assertEqual(holding.profit_loss, Decimal('-10.00'))
+        self.assertEqual(holding.pnl, Decimal('-10.00'))
+
+    def test_refresh_from_db_recalculates_the_values(self):
+        holding = Holding.objects.get(pk=self.holding.pk)
+        self.assertEqual(holding.current_value, Decimal('120.00'))
+
+        Holding.objects.filter(pk=holding.pk).update(current_price=Decimal('8.00'))
+        holding.refresh_from_db()
+        self.assertEqual(holding.current_value, Decimal('80.00'))
+
+    def test_cached_properties_are_derived_from_the_class(self):
+        self.assertEqual(
+            set(Holding.CACHED_PROPERTIES),
+            {'total_invested', 'current_value', 'profit_loss', 'profit_loss_percentage'}
+        )
+
+
+class HoldingSerializerTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.holding = Holding.objects.create(
+            user=self.user, stock='AAPL', quantity=10,
+            buying_price=Decimal('150.00'), current_price=Decimal('155.00')
+        )
+
+    def test_plain_instance_falls_back_to_model_properties(self):
+        data = HoldingSerializer(Holding.objects.get(pk=self.holding.pk)).data
+
+        self.assertEqual(data['total_invested'], Decimal('1500.00'))
+        self.assertEqual(data['current_value'], Decimal('1550.00'))
+        self.assertEqual(data['profit_loss'], Decimal('50.00'))
+        self.assertAlmostEqual(data['profit_loss_percentage'], 100 / 30)
+
+    def test_saved_instance_reports_the_recomputed_profit_loss(self):
+        holding = Holding.objects.get(pk=self.holding.pk)
+        serializer = HoldingSerializer(holding, data={'current_price': '140.00'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        data = serializer.data
+        self.assertEqual(data['current_value'], Decimal('1400.00'))
+        self.assertEqual(data['profit_loss'], Decimal('-100.00'))
+        self.assertAlmostEqual(data['profit_loss_percentage'], -100 / 15)
+
+    def test_plain_instance_matches_api_output(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        api_data = client.get(f'/api/holdings/{self.holding.pk}/').json()
+
+        data = HoldingSerializer(Holding.objects.get(pk=self.holding.pk)).data
+        self.assertEqual(list(data), list(api_data))
+        for name in ('total_invested', 'current_value', 'profit_loss', 'profit_loss_percentage'):
+            self.assertAlmostEqual(float(data[name]), api_data[name])
+
+
+class BulkTransactionTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_bulk(self, payload):
+        return self.client.post('/api/transactions/bulk/', payload, format='json')
+
+    def test_running_balance_after(self):
+        response = self.post_bulk([
+            {'transaction_type': 'deposit', 'credit': '100.00', 'description': 'first'},
+            {'transaction_type': 'withdrawal', 'debit': '30.50', 'description': 'second'},
+            {'transaction_type': 'dividend', 'debit': '0.00', 'credit': '5.25', 'description': 'third'},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['balance_after'] for row in response.json()], ['100.00', '69.50', '74.75'])
+        self.assertEqual(
+            list(self.user.transactions.order_by('id').values_list('balance_after', flat=True)),
+            [Decimal('100.00'), Decimal('69.50'), Decimal('74.75')]
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('74.75'))
+
+    def test_overdraft_rolls_back_the_whole_import(self):
+        response = self.post_bulk([
+            {'transaction_type': 'deposit', 'credit': '10.00', 'description': 'deposit'},
+            {'transaction_type': 'withdrawal', 'debit': '20.00', 'description': 'overdraft'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.user.transactions.exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('0.00'))
+
+    def test_rejects_non_list_input(self):
+        response = self.post_bulk({'transaction_type': 'deposit', 'credit': '10.00', 'description': 'x'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.user.transactions.exists())
+
+
+class TransactionCreateTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_debit_and_credit_are_optional(self):
+        response = self.client.post(
+            '/api/transactions/', {'transaction_type': 'deposit', 'credit': '10.00', 'description': 'x'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(
+            '/api/transactions/', {'transaction_type': 'withdrawal', 'debit': '4.00', 'description': 'y'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(
+            list(self.user.transactions.order_by('id').values_list('balance_after', flat=True)),
+            [Decimal('10.00'), Decimal('6.00')]
+        )
+
+
+# A cache backend every worker on the host can see, which the token cache requires
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='trading-test-cache-'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.key = self.token.key
+        self.auth = CachedTokenAuthentication()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def authenticate(self):
+        user, token = self.auth.authenticate_credentials(self.key)
+        return user
+
+    def test_cache_miss_costs_one_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_second_lookup_is_served_from_the_cache(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_password_and_balance_are_not_cached(self):
+        self.authenticate()
+        user = self.authenticate()
+
+        self.assertTrue({'password', 'balance'} <= user.get_deferred_fields())
+        self.assertNotIn(self.user.password, repr(cache.get(token_cache_key(self.key))))
+
+    def test_saving_the_user_invalidates_the_entry(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.name = 'Renamed'
+            self.user.save()
+
+        self.assertEqual(self.authenticate().name, 'Renamed')
+
+    def test_deactivating_the_user_revokes_the_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleting_the_token_revokes_it(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_entry_filled_before_an_invalidation_is_not_served(self):
+        # A request read the user under this version, then a change committed
+        # before it got to write its (now stale) cache entry
+        cache.add(token_version_key(self.key), 'before')
+        version = cache.get(token_version_key(self.key))
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(name='Renamed')
+            self.user.save(update_fields=['is_active'])
+        stale = {'name': 'Stale'}
+        cache.set(token_cache_key(self.key), {
+            'version': version,
+            'values': [stale.get(name, getattr(self.user, name)) for name in CACHED_USER_FIELDS],
+        })
+
+        self.assertEqual(self.authenticate().name, 'Renamed')
+
+    def test_balance_endpoints_read_the_database(self):
+        self.client.get('/api/users/profile/')
+        # A credit committed by another worker, which can't reach this process's cache
+        User.objects.filter(pk=self.user.pk).update(balance=Decimal('500.00'))
+
+        self.assertEqual(self.client.get('/api/users/profile/').json()['balance'], '500.00')
+        self.assertEqual(self.client.get('/api/transactions/summary/').json()['current_balance'], 500.0)
+        self.assertEqual(self.client.get('/api/portfolio/summary/').json()['total_balance'], '500.00')
+
+    def test_profile_update_keeps_a_concurrent_balance_change(self):
+        self.client.get('/api/users/profile/')
+        User.objects.filter(pk=self.user.pk).update(balance=Decimal('500.00'))
+
+        response = self.client.patch('/api/users/update_profile/', {'name': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['balance'], '500.00')
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.name, self.user.balance), ('Renamed', Decimal('500.00')))
+
+
+class LocalCacheTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.token = Token.objects.create(user=create_user())
+
+    def test_per_process_cache_is_not_used(self):
+        auth = CachedTokenAuthentication()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                user, token = auth.authenticate_credentials(self.token.key)
+            self.assertEqual(user.pk, self.token.user_id)
+
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
@@ -1,20 +1,117 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.relations import ManyRelatedField
 from django.contrib.auth import authenticate
-from django.db.models import Sum, Count
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import (
+    Sum, Count, F, Value, Case, When, ExpressionWrapper, Subquery, OuterRef,
+    DecimalField, FloatField
+)
+from django.db.models.functions import Cast, Coalesce
 from decimal import Decimal
 from .models import User, Transaction, Holding
+from .pagination import TransactionCursorPagination, HoldingCursorPagination
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, UserLoginSerializer,
     TransactionSerializer, TransactionCreateSerializer,
-    HoldingSerializer, HoldingCreateSerializer, PortfolioSummarySerializer
+    HoldingSerializer, HoldingCreateSerializer, PortfolioSummarySerializer,
+    update_balance
 )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class PaginatedListMixin:
+    """
+    Mixin for custom list actions that paginates them like the default list route
+    """
+    def paginated_list_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class QueryOptimizerMixin:
+    """
+    Mixin that joins or prefetches the relations the serializer reads through
+    dotted `source` attributes, so serializer changes can't reintroduce N+1 queries.
+    Both the model and joined models are narrowed to the columns the serializer
+    for the current action actually uses.
+    """
+    _query_plans = {}
+    
+    def optimize_queryset(self, queryset):
+        # Nothing is serialized when deleting, so the primary key is enough
+        if self.action == 'destroy':
+            return queryset.only(queryset.model._meta.pk.name)
+        
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self._query_plans:
+            self._query_plans[serializer_class] = self.build_query_plan(queryset.model, serializer_class)
+        select_related, prefetch_related, only = self._query_plans[serializer_class]
+        
+        queryset = queryset.select_related(*select_related).only(*only) if select_related else queryset.only(*only)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+    
+    def build_query_plan(self, model, serializer_class):
+        select_related, prefetch_related, related_columns = set(), set(), {}
+        columns, load_all_columns = {model._meta.pk.name}, False
+        
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, ManyRelatedField):
+                prefetch_related.add(field.source)
+                continue
+            if field.source == '*':
+                load_all_columns = True
+                continue
+            
+            relation, _, attr = field.source.partition('.')
+            try:
+                model_field = model._meta.get_field(relation)
+            except FieldDoesNotExist:
+                # Properties and methods may read any column; anything else is an annotation
+                if hasattr(model, relation):
+                    load_all_columns = True
+                continue
+            
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch_related.add(relation)
+                continue
+            
+            columns.add(relation)
+            if not attr:
+                continue
+            
+            select_related.add(relation)
+            selected = related_columns.setdefault(relation, set())
+            related_names = {f.name for f in model_field.related_model._meta.concrete_fields}
+            if selected is not None and attr in related_names:
+                selected.add(attr)
+            else:
+                # Nested or computed attribute: load the whole related row
+                related_columns[relation] = None
+        
+        only = [f.name for f in model._meta.concrete_fields if load_all_columns or f.name in columns]
+        for relation, selected in related_columns.items():
+            related_model = model._meta.get_field(relation).related_model
+            for name in selected or (f.name for f in related_model._meta.concrete_fields):
+                only.append(f'{relation}__{name}')
+        
+        return select_related, prefetch_related, only
+
+
+class UserViewSet(QueryOptimizerMixin, viewsets.ModelViewSet):
     """
     ViewSet for User model
     """
@@ -23,10 +120,12 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
+        queryset = self.optimize_queryset(User.objects.all())
+        
         # Users can only see their own profile unless they're staff
         if self.request.user.is_staff:
-            return User.objects.all()
-        return User.objects.filter(id=self.request.user.id)
+            return queryset
+        return queryset.filter(id=self.request.user.id)
     
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
     def register(self, request):
@@ -80,7 +179,8 @@ class UserViewSet(viewsets.ModelViewSet):
         Get current user profile
         GET /api/users/profile/
         """
-        serializer = UserSerializer(request.user)
+        # request.user may come from the token cache, so read the profile itself
+        serializer = UserSerializer(self.get_queryset().get(pk=request.user.pk))
         return Response(serializer.data)
     
     @action(detail=False, methods=['put', 'patch'], permission_classes=[IsAuthenticated])
@@ -89,24 +189,27 @@ class UserViewSet(viewsets.ModelViewSet):
         Update current user profile
         PUT/PATCH /api/users/update_profile/
         """
-        serializer = UserSerializer(request.user, data=request.data, partial=True)
+        serializer = UserSerializer(self.get_queryset().get(pk=request.user.pk), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(QueryOptimizerMixin, PaginatedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Transaction model
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
     
     def get_queryset(self):
+        queryset = self.optimize_queryset(Transaction.objects.all())
+        
         # Users can only see their own transactions unless they're staff
         if self.request.user.is_staff:
-            return Transaction.objects.all()
-        return Transaction.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -128,8 +231,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         else:
             queryset = self.get_queryset()
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_list_response(queryset)
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
@@ -141,6 +243,41 @@ class TransactionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many transactions in one request
+        POST /api/transactions/bulk/
+        """
+        serializer = TransactionCreateSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        with transaction.atomic():
+            # Lock the user's row so the running balances can't race other writes
+            balance = User.objects.select_for_update().values_list('balance', flat=True).get(pk=user.pk)
+            starting_balance = balance
+            
+            transactions = []
+            for data in serializer.validated_data:
+                # debit and credit are optional, defaulting to zero like the model
+                data.setdefault('debit', Decimal('0.00'))
+                data.setdefault('credit', Decimal('0.00'))
+                balance += data['credit'] - data['debit']
+                if balance < 0:
+                    raise ValidationError('Insufficient balance')
+                transactions.append(Transaction(user=user, balance_after=balance, **data))
+            
+            # One batched INSERT and a single balance UPDATE for the whole import
+            Transaction.objects.bulk_create(transactions, batch_size=1000)
+            update_balance(user, balance - starting_balance)
+        
+        return Response(
+            TransactionSerializer(transactions, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+    
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
@@ -149,30 +286,54 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """
         queryset = self.get_queryset()
         
-        total_debits = queryset.aggregate(total=Sum('debit'))['total'] or Decimal('0.00')
-        total_credits = queryset.aggregate(total=Sum('credit'))['total'] or Decimal('0.00')
-        transaction_count = queryset.count()
+        totals = queryset.aggregate(
+            total_debits=Coalesce(Sum('debit'), Value(Decimal('0.00'))),
+            total_credits=Coalesce(Sum('credit'), Value(Decimal('0.00'))),
+            transaction_count=Count('id')
+        )
+        
+        total_debits = totals['total_debits']
+        total_credits = totals['total_credits']
+        transaction_count = totals['transaction_count']
         
         return Response({
             'total_debits': total_debits,
             'total_credits': total_credits,
             'net_amount': total_credits - total_debits,
             'transaction_count': transaction_count,
-            'current_balance': request.user.balance
+            'current_balance': User.objects.values_list('balance', flat=True).get(pk=request.user.pk)
         })
 
 
-class HoldingViewSet(viewsets.ModelViewSet):
+class HoldingViewSet(QueryOptimizerMixin, PaginatedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Holding model
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = HoldingCursorPagination
     
     def get_queryset(self):
+        # Let the database compute the values HoldingSerializer reports
+        queryset = self.optimize_queryset(Holding.objects.annotate(
+            invested_amount=ExpressionWrapper(
+                F('quantity') * F('buying_price'),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ),
+            market_value=ExpressionWrapper(
+                F('quantity') * F('current_price'),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ),
+            pnl_percentage=Case(
+                When(quantity__gt=0, then=Cast('pnl', FloatField()) * 100 / Cast('invested_amount', FloatField())),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        ))
+        
         # Users can only see their own holdings unless they're staff
         if self.request.user.is_staff:
-            return Holding.objects.all()
-        return Holding.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -182,6 +343,11 @@ class HoldingViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    def perform_update(self, serializer):
+        serializer.save()
+        # Reload so the database-computed values reflect the new prices
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+    
     @action(detail=False, methods=['get'])
     def by_stock(self, request):
         """
@@ -194,8 +360,7 @@ class HoldingViewSet(viewsets.ModelViewSet):
         else:
             queryset = self.get_queryset()
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_list_response(queryset)
     
     @action(detail=False, methods=['get'])
     def profitable(self, request):
@@ -203,11 +368,8 @@ class HoldingViewSet(viewsets.ModelViewSet):
         Get only profitable holdings
         GET /api/holdings/profitable/
         """
-        queryset = self.get_queryset().extra(
-            where=["(quantity * current_price) > (quantity * buying_price)"]
-        )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(pnl__gt=0)
+        return self.paginated_list_response(queryset)
     
     @action(detail=False, methods=['get'])
     def losing(self, request):
@@ -215,11 +377,8 @@ class HoldingViewSet(viewsets.ModelViewSet):
         Get only losing holdings
         GET /api/holdings/losing/
         """
-        queryset = self.get_queryset().extra(
-            where=["(quantity * current_price) < (quantity * buying_price)"]
-        )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(pnl__lt=0)
+        return self.paginated_list_response(queryset)
     
     @action(detail=False, methods=['get'])
     def summary(self, request):
@@ -229,8 +388,21 @@ class HoldingViewSet(viewsets.ModelViewSet):
         """
         queryset = self.get_queryset()
         
-        total_invested = sum(holding.total_invested for holding in queryset)
-        total_current_value = sum(holding.current_value for holding in queryset)
+        # Let the database compute the totals in a single query
+        totals = queryset.aggregate(
+            total_invested=Coalesce(
+                Sum(F('quantity') * F('buying_price'), output_field=DecimalField(max_digits=20, decimal_places=2)),
+                Value(Decimal('0.00'))
+            ),
+            total_current_value=Coalesce(
+                Sum(F('quantity') * F('current_price'), output_field=DecimalField(max_digits=20, decimal_places=2)),
+                Value(Decimal('0.00'))
+            ),
+            holdings_count=Count('id')
+        )
+        
+        total_invested = totals['total_invested']
+        total_current_value = totals['total_current_value']
         total_profit_loss = total_current_value - total_invested
         total_profit_loss_percentage = (total_profit_loss / total_invested * 100) if total_invested > 0 else 0
         
@@ -239,7 +411,7 @@ class HoldingViewSet(viewsets.ModelViewSet):
             'total_current_value': total_current_value,
             'total_profit_loss': total_profit_loss,
             'total_profit_loss_percentage': round(total_profit_loss_percentage, 2),
-            'holdings_count': queryset.count()
+            'holdings_count': totals['holdings_count']
         })
 
 
@@ -255,24 +427,40 @@ class PortfolioViewSet(viewsets.ViewSet):
         Get complete portfolio summary
         GET /api/portfolio/summary/
         """
-        user = request.user
-        holdings = Holding.objects.filter(user=user)
-        transactions = Transaction.objects.filter(user=user)
+        money = DecimalField(max_digits=20, decimal_places=2)
         
-        # Calculate holdings totals
-        total_invested = sum(holding.total_invested for holding in holdings)
-        total_current_value = sum(holding.current_value for holding in holdings)
+        # Holdings totals and the transaction count as per-user subqueries, so the
+        # balance and every aggregate come back on a single user row
+        holdings = Holding.objects.filter(user=OuterRef('pk')).order_by().values('user')
+        transactions = Transaction.objects.filter(user=OuterRef('pk')).order_by().values('user')
+        totals = User.objects.filter(pk=request.user.pk).annotate(
+            total_invested=Coalesce(
+                Subquery(holdings.annotate(total=Sum(F('quantity') * F('buying_price'), output_field=money)).values('total')),
+                Value(Decimal('0.00')),
+                output_field=money
+            ),
+            total_current_value=Coalesce(
+                Subquery(holdings.annotate(total=Sum(F('quantity') * F('current_price'), output_field=money)).values('total')),
+                Value(Decimal('0.00')),
+                output_field=money
+            ),
+            holdings_count=Coalesce(Subquery(holdings.annotate(count=Count('id')).values('count')), 0),
+            transactions_count=Coalesce(Subquery(transactions.annotate(count=Count('id')).values('count')), 0)
+        ).values('balance', 'total_invested', 'total_current_value', 'holdings_count', 'transactions_count').get()
+        
+        total_invested = totals['total_invested']
+        total_current_value = totals['total_current_value']
         total_profit_loss = total_current_value - total_invested
         total_profit_loss_percentage = (total_profit_loss / total_invested * 100) if total_invested > 0 else 0
         
         data = {
-            'total_balance': user.balance,
+            'total_balance': totals['balance'],
             'total_invested': total_invested,
             'total_current_value': total_current_value,
             'total_profit_loss': total_profit_loss,
             'total_profit_loss_percentage': round(total_profit_loss_percentage, 2),
-            'holdings_count': holdings.count(),
-            'transactions_count': transactions.count()
+            'holdings_count': totals['holdings_count'],
+            'transactions_count': totals['transactions_count']
         }
         
         serializer = PortfolioSummarySerializer(data)
@@ -285,9 +473,13 @@ class PortfolioViewSet(viewsets.ViewSet):
         GET /api/portfolio/performance/
         """
         user = request.user
-        holdings = Holding.objects.filter(user=user)
+        # Load the needed columns once as plain tuples; the database supplies P/L
+        # via the generated pnl column. An empty list doubles as the "no holdings" check
+        holdings = list(
+            Holding.objects.filter(user=user).values_list('stock', 'quantity', 'buying_price', 'pnl')
+        )
         
-        if not holdings.exists():
+        if not holdings:
             return Response({
                 'message': 'No holdings found',
                 'total_return': 0,
@@ -297,11 +489,12 @@ class PortfolioViewSet(viewsets.ViewSet):
         
         # Calculate performance metrics
         performance_data = []
-        for holding in holdings:
+        for stock, quantity, buying_price, pnl in holdings:
+            total_invested = quantity * buying_price
             performance_data.append({
-                'stock': holding.stock,
-                'profit_loss': float(holding.profit_loss),
-                'profit_loss_percentage': float(holding.profit_loss_percentage)
+                'stock': stock,
+                'profit_loss': float(pnl),
+                'profit_loss_percentage': float(pnl / total_invested * 100) if total_invested > 0 else 0.0
             })
         
         # Sort by performance
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'trading_app',
 ]
 
@@ -130,7 +131,7 @@ AUTH_USER_MODEL = 'trading_app.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'trading_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -138,7 +139,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'trading_app.renderers.OrjsonRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The local-memory cache is per process, so CachedTokenAuthentication stays
+# off with it and every request looks its token up in the database. Switch to
+# a shared backend (e.g. Redis) to enable token caching.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds CachedTokenAuthentication keeps a token's user cached. Only
+# identity and permission columns are cached; balances and password hashes
+# are always read from the database. Logout and changes saved through the
+# User model take effect immediately. Queryset updates that bypass the model
+# signals (e.g. .update(is_active=False)) take up to this long unless they
+# call forget_cached_user().
+TOKEN_CACHE_TIMEOUT = 60